@@ -1,64 +1,79 @@
 # api/main.py
+import asyncio
 import json
 
 # ----- logging -----
 import logging
+import os
 from contextlib import asynccontextmanager
 from datetime import UTC, datetime
 from typing import Any, Literal
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
+from fastapi import FastAPI, HTTPException, Request
+from pydantic import BaseModel, Field, TypeAdapter
 
 # watcher lifecycle
 from scripts.file_watcher import start_watcher, stop_watcher
 
-# DB helpers
-from .utils.db import ensure_initialized, get_conn
+# DB helpers (all schema/DDL lives in utils.db)
+from .utils import db
+from .utils.db import (
+    close_all,
+    ensure_initialized,
+    ensure_normalized_schema,
+    get_conn,
+)
+from .utils.quota import enforce_quota_loop
+
+# Prefer orjson for hot-path serialization (Rust implementation, ~5x faster
+# than stdlib json for small dicts); fall back gracefully if not installed.
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        # SQLite TEXT column wants str; decode is cheap vs json.dumps
+        return orjson.dumps(obj).decode()
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover
+
+    def _dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+    _loads = json.loads
+
 
 logger = logging.getLogger("uvicorn.error")
 logger.info("[Munin] >>> MAIN.PY loaded <<<")
 
 
-# ----- extra schema for normalized/batched ingestion -----
-def ensure_normalized_schema() -> None:
-    with get_conn() as conn:
-        cur = conn.cursor()
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS normalized_events (
-          id INTEGER PRIMARY KEY AUTOINCREMENT,
-          inserted_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
-          source_path TEXT NOT NULL,
-          source_type TEXT,
-          line_number INTEGER,
-          event_time TEXT,
-          level TEXT,
-          message TEXT,
-          attrs TEXT,
-          raw_excerpt TEXT,
-          content_hash TEXT
-        );
-        """)
-        cur.execute(
-            "CREATE INDEX IF NOT EXISTS idx_norm_time ON normalized_events (event_time);"
-        )
-        cur.execute(
-            "CREATE INDEX IF NOT EXISTS idx_norm_src  ON normalized_events (source_path);"
-        )
-        cur.execute(
-            "CREATE UNIQUE INDEX IF NOT EXISTS uq_norm_hash ON normalized_events (content_hash);"
-        )
-        conn.commit()
+# ----- lifespan (startup/shutdown) -----
+QUOTA_CHECK_INTERVAL_SEC = float(os.getenv("QUOTA_CHECK_INTERVAL_SEC", "60"))
+
+
+async def _quota_monitor() -> None:
+    """Run quota enforcement periodically so requests never pay for it."""
+    while True:
+        try:
+            ok = await asyncio.to_thread(enforce_quota_loop)
+            if not ok:
+                logger.warning("[Munin] quota monitor: DB still above high watermark")
+        except Exception as e:
+            logger.warning(f"[Munin] quota monitor error: {e}")
+        await asyncio.sleep(QUOTA_CHECK_INTERVAL_SEC)
 
 
-# ----- lifespan (startup/shutdown) -----
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    global _ingest_queue, _writer_task
     # Startup
     ensure_initialized()  # your existing logs table, etc.
     ensure_normalized_schema()  # new normalized_events table
     logger.info("[Munin] DB initialized (logs + normalized_events)")
 
+    _ingest_queue = asyncio.Queue()
+    _writer_task = asyncio.create_task(_ingest_writer())
+    quota_task = asyncio.create_task(_quota_monitor())
+
     start_watcher()
     logger.info("[Munin] File watcher started")
     yield
@@ -69,6 +84,16 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"[Munin] stop_watcher error: {e}")
 
+    quota_task.cancel()
+    # Flush anything still queued, then stop the writer
+    if _writer_task is not None:
+        while not _ingest_queue.empty():
+            await asyncio.sleep(INGEST_COALESCE_WINDOW)
+        _writer_task.cancel()
+        _writer_task = None
+    _ingest_queue = None
+    close_all()
+
 
 app = FastAPI(
     title="Munin-Core API",
@@ -107,6 +132,11 @@ class BatchIngest(BaseModel):
     events: list[NormalizedEventModel]
 
 
+# Module-level adapter: validates the raw request bytes in one rust-core
+# pass instead of FastAPI's generic body-parse + model instantiation.
+_BATCH_ADAPTER: TypeAdapter[BatchIngest] = TypeAdapter(BatchIngest)
+
+
 # ----- Routes -----
 @app.get("/health")
 def health():
@@ -118,100 +148,276 @@ def health():
         return {"status": "degraded", "error": str(e)}
 
 
+def _insert_log_row(source: str, ts: str, level: str | None, message: str) -> None:
+    with get_conn() as conn:
+        conn.execute(
+            "INSERT INTO logs (source, timestamp, level, message) VALUES (?, ?, ?, ?)",
+            (source, ts, level, message),
+        )
+        conn.commit()
+
+
+def _insert_log_rows(rows: list[tuple]) -> None:
+    with get_conn() as conn:
+        conn.executemany(
+            "INSERT INTO logs (source, timestamp, level, message) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+        conn.commit()
+
+
+# ----- coalescing writer for /ingest -----
+# Single-line ingests are queued and flushed in one transaction every few
+# milliseconds, so N concurrent producers pay one commit instead of N.
+INGEST_COALESCE_MAX = 500
+INGEST_COALESCE_WINDOW = 0.005  # seconds
+
+_ingest_queue: asyncio.Queue | None = None
+_writer_task: asyncio.Task | None = None
+
+
+async def _ingest_writer() -> None:
+    assert _ingest_queue is not None
+    loop = asyncio.get_running_loop()
+    while True:
+        items = [await _ingest_queue.get()]
+        deadline = loop.time() + INGEST_COALESCE_WINDOW
+        while len(items) < INGEST_COALESCE_MAX:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(_ingest_queue.get(), timeout))
+            except TimeoutError:
+                break
+        rows = [row for row, _ in items]
+        try:
+            await asyncio.to_thread(_insert_log_rows, rows)
+        except Exception as e:
+            for _, fut in items:
+                if not fut.done():
+                    fut.set_exception(e)
+        else:
+            for _, fut in items:
+                if not fut.done():
+                    fut.set_result(None)
+
+
 # Legacy single-line ingest (kept for compatibility)
 @app.post("/ingest", response_model=dict)
-def ingest(item: IngestItem):
+async def ingest(item: IngestItem):
     ts = datetime.now(UTC).isoformat(timespec="seconds")
     try:
-        with get_conn() as conn:
-            conn.execute(
-                "INSERT INTO logs (source, timestamp, level, message) VALUES (?, ?, ?, ?)",
-                (item.source, ts, item.level, item.message),
+        if _ingest_queue is None:
+            # writer not running (e.g. direct test invocation): write inline
+            await asyncio.to_thread(
+                _insert_log_row, item.source, ts, item.level, item.message
             )
-            conn.commit()
+        else:
+            fut: asyncio.Future = asyncio.get_running_loop().create_future()
+            await _ingest_queue.put(((item.source, ts, item.level, item.message), fut))
+            await fut
         return {"ok": True, "timestamp": ts}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"DB error: {e}") from e
 
 
+# Store attrs as JSONB where SQLite supports it; json() converts it back
+# to text on read so API responses are unchanged.
+_ATTRS_BIND = "jsonb(?)" if db.JSONB_OK else "?"
+_ATTRS_COL = "json(attrs) AS attrs" if db.JSONB_OK else "attrs"
+
+INSERT_EVENT_SQL = f"""
+INSERT OR IGNORE INTO normalized_events
+(source_path, source_type, line_number, event_time, level,
+ message, attrs, raw_excerpt, content_hash)
+VALUES (?, ?, ?, ?, ?, ?, {_ATTRS_BIND}, ?, ?)
+"""
+
+EVENT_COLS = (
+    "id, inserted_at, source_path, source_type, line_number, event_time, "
+    f"level, message, {_ATTRS_COL}, raw_excerpt, content_hash"
+)
+
+
+def _insert_event_rows(rows: list[tuple]) -> int:
+    with get_conn() as conn:
+        cur = conn.cursor()
+        # One prepared statement + one transaction for the whole batch;
+        # OR IGNORE still skips duplicate content_hash rows.
+        cur.executemany(INSERT_EVENT_SQL, rows)
+        inserted = cur.rowcount if cur.rowcount >= 0 else 0
+        conn.commit()
+    return inserted
+
+
 # NEW: batched, normalized ingest
 @app.post("/ingest/batch")
-def ingest_batch(payload: BatchIngest):
-    inserted = 0
+async def ingest_batch(request: Request):
     try:
-        with get_conn() as conn:
-            cur = conn.cursor()
-            for ev in payload.events:
-                try:
-                    cur.execute(
-                        """
-                    INSERT OR IGNORE INTO normalized_events
-                    (source_path, source_type, line_number, event_time, level,
-                     message, attrs, raw_excerpt, content_hash)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """,
-                        (
-                            ev.source_path,
-                            ev.source_type,
-                            ev.line_number,
-                            ev.event_time,
-                            ev.level,
-                            ev.message,
-                            json.dumps(ev.attrs or {}, ensure_ascii=False),
-                            ev.raw_excerpt,
-                            ev.content_hash,
-                        ),
-                    )
-                    inserted += cur.rowcount
-                except Exception:
-                    # skip bad rows and continue
-                    pass
-            conn.commit()
+        payload = _BATCH_ADAPTER.validate_json(await request.body())
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Invalid batch payload: {e}") from e
+    rows = [
+        (
+            ev.source_path,
+            ev.source_type,
+            ev.line_number,
+            ev.event_time,
+            ev.level,
+            ev.message,
+            _dumps(ev.attrs or {}),
+            ev.raw_excerpt,
+            ev.content_hash,
+        )
+        for ev in payload.events
+    ]
+    try:
+        inserted = await asyncio.to_thread(_insert_event_rows, rows)
         return {"ok": True, "inserted": inserted, "received": len(payload.events)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"DB error: {e}") from e
 
 
-@app.get("/logs", response_model=list[LogItem])
-def get_logs(source: str | None = None, limit: int = 10):
+NDJSON_CHUNK_ROWS = 1000
+
+
+def _row_from_obj(ev: dict) -> tuple | None:
+    """Build an insert tuple from a decoded NDJSON event; None if unusable."""
+    if not ev.get("source_path") or not ev.get("message") or not ev.get("content_hash"):
+        return None
+    return (
+        ev["source_path"],
+        ev.get("source_type"),
+        ev.get("line_number"),
+        ev.get("event_time"),
+        ev.get("level"),
+        ev["message"],
+        _dumps(ev.get("attrs") or {}),
+        ev.get("raw_excerpt"),
+        ev["content_hash"],
+    )
+
+
+# Bulk ingest: one event per line, parsed straight from bytes with no
+# Pydantic pass, inserted in fixed-size chunks so memory stays flat no
+# matter how large the upload is.
+@app.post("/ingest/batch/ndjson")
+async def ingest_ndjson(request: Request):
+    buf = bytearray()
+    rows: list[tuple] = []
+    inserted = received = skipped = 0
+
+    async def flush() -> None:
+        nonlocal inserted
+        if rows:
+            inserted += await asyncio.to_thread(_insert_event_rows, rows)
+            rows.clear()
+
+    def take(line: bytes) -> None:
+        nonlocal received, skipped
+        line = line.strip()
+        if not line:
+            return
+        received += 1
+        try:
+            row = _row_from_obj(_loads(line))
+        except Exception:
+            row = None
+        if row is None:
+            skipped += 1
+        else:
+            rows.append(row)
+
     try:
-        with get_conn() as conn:
-            if source:
-                cur = conn.execute(
-                    "SELECT timestamp, level, message, source FROM logs "
-                    "WHERE source=? ORDER BY id DESC LIMIT ?",
-                    (source, limit),
-                )
-            else:
-                cur = conn.execute(
-                    "SELECT timestamp, level, message, source FROM logs ORDER BY id DESC LIMIT ?",
-                    (limit,),
-                )
-            rows = [LogItem(**dict(r)) for r in cur.fetchall()]
-        return rows
+        async for chunk in request.stream():
+            buf += chunk
+            *lines, rest = buf.split(b"\n")
+            buf = bytearray(rest)
+            for line in lines:
+                take(line)
+            if len(rows) >= NDJSON_CHUNK_ROWS:
+                await flush()
+        take(bytes(buf))
+        await flush()
+        return {"ok": True, "inserted": inserted, "received": received, "skipped": skipped}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"DB error: {e}") from e
+
+
+def _query_logs(source: str | None, limit: int) -> list[dict]:
+    with get_conn() as conn:
+        if source:
+            cur = conn.execute(
+                "SELECT timestamp, level, message, source FROM logs "
+                "WHERE source=? ORDER BY id DESC LIMIT ?",
+                (source, limit),
+            )
+        else:
+            cur = conn.execute(
+                "SELECT timestamp, level, message, source FROM logs ORDER BY id DESC LIMIT ?",
+                (limit,),
+            )
+        # Rows come from our own DB; skip per-row Pydantic validation and
+        # hand sqlite3.Row straight to the JSON encoder as dicts.
+        return [dict(r) for r in cur.fetchall()]
+
+
+@app.get("/logs")
+async def get_logs(source: str | None = None, limit: int = 10):
+    try:
+        return await asyncio.to_thread(_query_logs, source, limit)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"DB error: {e}") from e
 
 
+def _query_events(
+    source: str | None,
+    level: str | None,
+    limit: int,
+    attr_key: str | None = None,
+    attr_value: str | None = None,
+) -> list[dict]:
+    with get_conn() as conn:
+        q = f"SELECT {EVENT_COLS} FROM normalized_events"
+        clauses, args = [], []
+        if source and db.fts_ok():
+            # Token/phrase match against the FTS index; O(matches) instead of
+            # the O(table) scan a %source% LIKE forces.
+            clauses.append(
+                "id IN (SELECT rowid FROM normalized_events_fts WHERE source_path MATCH ?)"
+            )
+            args.append('"' + source.replace('"', '""') + '"')
+        elif source:
+            clauses.append("source_path LIKE ?")
+            args.append(f"%{source}%")
+        if level:
+            clauses.append("COALESCE(level,'') = ?")
+            args.append(level.upper())
+        if attr_key and attr_value is not None:
+            clauses.append("json_extract(attrs, ?) = ?")
+            args.extend(("$." + attr_key, attr_value))
+        if clauses:
+            q += " WHERE " + " AND ".join(clauses)
+        q += " ORDER BY COALESCE(event_time, inserted_at) DESC, id DESC LIMIT ?"
+        args.append(limit)
+        cur = conn.execute(q, args)
+        return [dict(r) for r in cur.fetchall()]
+
+
 # NEW: query structured/normalized events
 @app.get("/events")
-def list_events(source: str | None = None, level: str | None = None, limit: int = 200):
+async def list_events(
+    source: str | None = None,
+    level: str | None = None,
+    limit: int = 200,
+    attr_key: str | None = None,
+    attr_value: str | None = None,
+):
     try:
-        with get_conn() as conn:
-            q = "SELECT * FROM normalized_events"
-            clauses, args = [], []
-            if source:
-                clauses.append("source_path LIKE ?")
-                args.append(f"%{source}%")
-            if level:
-                clauses.append("COALESCE(level,'') = ?")
-                args.append(level.upper())
-            if clauses:
-                q += " WHERE " + " AND ".join(clauses)
-            q += " ORDER BY COALESCE(event_time, inserted_at) DESC LIMIT ?"
-            args.append(limit)
-            cur = conn.execute(q, args)
-            rows = [dict(r) for r in cur.fetchall()]
+        rows = await asyncio.to_thread(
+            _query_events, source, level, limit, attr_key, attr_value
+        )
         return {"events": rows}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"DB error: {e}") from e
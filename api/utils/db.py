@@ -1,8 +1,12 @@
-import os
+import logging
 import sqlite3
+import threading
+import time
 from datetime import UTC, datetime
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 # <repo root>/memory/munin_memory.db
 DB_PATH = Path(__file__).resolve().parents[2] / "memory" / "munin_memory.db"
 
@@ -49,12 +53,14 @@ def _ensure_ingest_time_column(conn: sqlite3.Connection) -> None:
     We prefer a real column so we can prune by COALESCE(event_time, ingest_time).
     """
     if not _column_exists(conn, "logs", "ingest_time_utc"):
-        # Add the column
-        conn.execute("""
-            ALTER TABLE logs
-            ADD COLUMN ingest_time_utc TEXT NOT NULL
-            DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now'))
-        """)
+        # SQLite rejects ALTER TABLE ADD COLUMN with a non-constant
+        # default, so add the column bare and backfill; the insert paths
+        # always supply ingest_time_utc explicitly.
+        conn.execute("ALTER TABLE logs ADD COLUMN ingest_time_utc TEXT")
+        conn.execute(
+            "UPDATE logs SET ingest_time_utc = strftime('%Y-%m-%dT%H:%M:%fZ','now') "
+            "WHERE ingest_time_utc IS NULL"
+        )
         # Optional index to speed up time-based pruning
         conn.execute(
             "CREATE INDEX IF NOT EXISTS idx_logs_ingest_time ON logs(ingest_time_utc)"
@@ -84,15 +90,161 @@ def ensure_initialized():
         conn.commit()
 
 
+# SQLite 3.45+ can store attrs as JSONB (binary JSON): smaller rows and
+# faster json_extract traversal than re-parsing TEXT per row.
+JSONB_OK = sqlite3.sqlite_version_info >= (3, 45, 0)
+
+# True once ensure_normalized_schema ran on a build with FTS5 support.
+_fts_ok = False
+
+
+def fts_ok() -> bool:
+    return _fts_ok
+
+
+def ensure_normalized_schema() -> None:
+    """Create the normalized_events table, its indexes, and the FTS mirror."""
+    global _fts_ok
+    with get_conn() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS normalized_events (
+          id INTEGER PRIMARY KEY AUTOINCREMENT,
+          inserted_at TEXT DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+          source_path TEXT NOT NULL,
+          source_type TEXT,
+          line_number INTEGER,
+          event_time TEXT,
+          level TEXT,
+          message TEXT,
+          attrs TEXT,
+          raw_excerpt TEXT,
+          content_hash TEXT
+        );
+        """)
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_norm_time ON normalized_events (event_time);"
+        )
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_norm_src  ON normalized_events (source_path);"
+        )
+        cur.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_norm_hash ON normalized_events (content_hash);"
+        )
+        # Expression index matching the /events ORDER BY exactly, so the
+        # planner can walk it instead of sorting the whole filtered set.
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_norm_order ON normalized_events "
+            "(COALESCE(event_time, inserted_at) DESC, id DESC);"
+        )
+        # FTS5 mirror of source_path/message so /events filters hit an
+        # inverted index instead of a leading-wildcard LIKE table scan.
+        fts_existed = (
+            cur.execute(
+                "SELECT 1 FROM sqlite_master "
+                "WHERE type='table' AND name='normalized_events_fts'"
+            ).fetchone()
+            is not None
+        )
+        try:
+            cur.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS normalized_events_fts USING fts5(
+              source_path, message,
+              content=normalized_events, content_rowid=id
+            );
+            CREATE TRIGGER IF NOT EXISTS normalized_events_fts_ai
+            AFTER INSERT ON normalized_events BEGIN
+              INSERT INTO normalized_events_fts(rowid, source_path, message)
+              VALUES (new.id, new.source_path, new.message);
+            END;
+            CREATE TRIGGER IF NOT EXISTS normalized_events_fts_ad
+            AFTER DELETE ON normalized_events BEGIN
+              INSERT INTO normalized_events_fts(normalized_events_fts, rowid, source_path, message)
+              VALUES ('delete', old.id, old.source_path, old.message);
+            END;
+            """)
+            if not fts_existed:
+                # First creation on a DB that may already hold rows: the
+                # triggers only cover future writes, so index what's
+                # there now or pre-existing events vanish from filtered
+                # results.
+                cur.execute(
+                    "INSERT INTO normalized_events_fts(normalized_events_fts) "
+                    "VALUES('rebuild')"
+                )
+            _fts_ok = True
+        except Exception as e:
+            logger.warning("FTS5 unavailable, /events falls back to LIKE: %s", e)
+            _fts_ok = False
+        conn.commit()
+
+
+def _apply_pragmas(conn: sqlite3.Connection) -> None:
+    """
+    Tune the connection for concurrent ingest + reads:
+    - WAL lets readers run alongside the writer.
+    - synchronous=NORMAL skips the per-commit fsync (safe with WAL).
+    - Bigger cache/mmap keep the B-tree hot for ORDER BY scans.
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-16384")  # 16 MiB
+    conn.execute("PRAGMA mmap_size=268435456")  # 256 MiB
+
+
+# One cached connection per thread: FastAPI runs sync endpoints on a
+# threadpool, so this gives us a small pool for free without paying
+# connect() + PRAGMA setup on every request.
+_tls = threading.local()
+_pool_lock = threading.Lock()
+_pool: list[sqlite3.Connection] = []
+
+
+# Once-per-process init guard: replaces the stat() syscall that the old
+# DB_PATH.exists() check paid on every connection open.
+_initialized = False
+_init_lock = threading.Lock()
+
+
+def _ensure_initialized_once() -> None:
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if not _initialized:
+            if not DB_PATH.exists():
+                ensure_initialized()
+            _initialized = True
+
+
 def get_conn() -> sqlite3.Connection:
-    """Return a connection; ensures DB/schema exist."""
-    if not DB_PATH.exists():
-        ensure_initialized()
-    conn = sqlite3.connect(DB_PATH)
+    """Return this thread's cached connection; ensures DB/schema exist."""
+    conn = getattr(_tls, "conn", None)
+    if conn is not None:
+        return conn
+    _ensure_initialized_once()
+    # A larger statement cache keeps the batch INSERT and the handful of
+    # query shapes permanently prepared on each pooled connection.
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
     conn.row_factory = sqlite3.Row
+    _apply_pragmas(conn)
+    _tls.conn = conn
+    with _pool_lock:
+        _pool.append(conn)
     return conn
 
 
+def close_all() -> None:
+    """Close every pooled connection (lifespan shutdown hook)."""
+    with _pool_lock:
+        while _pool:
+            try:
+                _pool.pop().close()
+            except Exception:
+                pass
+
+
 # ---------- helpers we’ll use next steps ----------
 
 
@@ -111,13 +263,31 @@ def emit_alert(
         conn.commit()
 
 
-def get_db_size_bytes() -> int:
+# Short-TTL cache: /health and the quota monitor both ask for the size,
+# and even pragma round-trips add up on the hot path.
+DB_SIZE_TTL_SEC = 5.0
+_db_size_cached = 0
+_db_size_deadline = 0.0
+
+
+def get_db_size_bytes(refresh: bool = False) -> int:
     """
-    Total size of SQLite DB including WAL/SHM if present.
+    Logical size of the SQLite DB, computed inside this thread's open
+    connection as (page_count - freelist_count) * page_size — no stat()
+    syscalls, no separate WAL/SHM accounting, and pages freed by pruning
+    count as reclaimed immediately even though the file only shrinks on
+    VACUUM. Cached for a few seconds; pass refresh=True to force a
+    re-read.
     """
-    base = str(DB_PATH)
-    size = 0
-    for p in (base, f"{base}-wal", f"{base}-shm"):
-        if os.path.exists(p):
-            size += os.path.getsize(p)
+    global _db_size_cached, _db_size_deadline
+    now = time.monotonic()
+    if not refresh and now < _db_size_deadline:
+        return _db_size_cached
+    conn = get_conn()
+    (pages,) = conn.execute("PRAGMA page_count").fetchone()
+    (free,) = conn.execute("PRAGMA freelist_count").fetchone()
+    (page_size,) = conn.execute("PRAGMA page_size").fetchone()
+    size = (pages - free) * page_size
+    _db_size_cached = size
+    _db_size_deadline = now + DB_SIZE_TTL_SEC
     return size
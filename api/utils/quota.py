@@ -17,7 +17,8 @@ def enforce_quota_loop() -> bool:
     """
     conn = sqlite3.connect(DB_PATH)
     try:
-        while get_db_size_bytes() > HIGH_WM_GIB * (1 << 30):
+        # refresh=True: the prune loop must see real sizes, not the TTL cache
+        while get_db_size_bytes(refresh=True) > HIGH_WM_GIB * (1 << 30):
             cur = conn.cursor()
             cur.execute("BEGIN")
             # delete oldest rows based on either event time OR ingest time
@@ -45,6 +46,6 @@ def enforce_quota_loop() -> bool:
                     f'{{"high_gib": {HIGH_WM_GIB}, "low_gib": {LOW_WM_GIB}}}',
                 )
                 return False
-        return get_db_size_bytes() <= LOW_WM_GIB * (1 << 30)
+        return get_db_size_bytes(refresh=True) <= LOW_WM_GIB * (1 << 30)
     finally:
         conn.close()
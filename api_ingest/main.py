@@ -1,16 +1,40 @@
-from fastapi import FastAPI
+import asyncio
+import gzip
+import json
+
+from fastapi import FastAPI, HTTPException, Request
 
 from storage.factory import get_storage_backend
 
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover - optional speedup
+    _loads = json.loads
+
 app = FastAPI()
 backend = get_storage_backend("sqlite", db_path="munin.db")
 backend.connect()
 
 
 @app.post("/ingest")
-def ingest(data: dict):
+async def ingest(request: Request):
+    # Raw-body path so the watcher can send gzipped payloads; FastAPI's
+    # dict parsing would reject Content-Encoding: gzip outright.
+    body = await request.body()
+    try:
+        if request.headers.get("content-encoding") == "gzip":
+            body = gzip.decompress(body)
+        data = _loads(body)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Invalid payload: {e}") from e
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=422, detail="Payload must be a JSON object")
     events = data.get("events", [])
     if not events:
         return {"status": "no events"}
-    backend.write_batch(events)
+    # write_batch blocks (and may trigger a prune); keep it off the
+    # event loop so other requests aren't stalled behind it.
+    await asyncio.to_thread(backend.write_batch, events)
     return {"status": "ok", "count": len(events)}
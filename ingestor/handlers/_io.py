@@ -0,0 +1,88 @@
+"""
+Shared low-level file reading helpers for handlers.
+
+Handlers used to iterate text-mode file objects line by line, paying a
+read + decode + allocation per line. Reading via mmap lets the decode
+and newline split run over big slices in C — whole-file for read_text,
+one bounded chunk at a time for read_lines.
+"""
+
+import mmap
+from collections.abc import Iterator
+from pathlib import Path
+
+
+def read_text(path: Path) -> str:
+    """
+    Return the whole file decoded as UTF-8 (errors ignored).
+
+    mmaps the file and decodes straight from the mapped buffer, so the
+    only userspace copy is the decoded string itself. Empty files (mmap
+    cannot map zero bytes) and filesystems without mmap support fall
+    back to a plain read.
+    """
+    with path.open("rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            return f.read().decode("utf-8", errors="ignore")
+        try:
+            mv = memoryview(mm)
+            try:
+                # ASCII fast path: if the head looks ASCII (true for most
+                # syslog/CSV/JSONL), try the strict ascii codec — roughly a
+                # memcpy versus utf-8's state machine — and fall back on
+                # the first non-ASCII byte further in.
+                if mm[:4096].isascii():
+                    try:
+                        return str(mv, "ascii")
+                    except UnicodeDecodeError:
+                        pass
+                return str(mv, "utf-8", "ignore")
+            finally:
+                mv.release()
+        finally:
+            mm.close()
+
+
+# Slice size for read_lines: big enough that the per-chunk decode and
+# split amortize to nothing, small enough that peak memory stays flat
+# even when several files parse concurrently.
+_CHUNK_BYTES = 1 << 20
+
+
+def read_lines(path: Path) -> Iterator[str]:
+    """
+    Yield lines (no trailing newline) with bounded memory.
+
+    The file is mmapped and walked one _CHUNK_BYTES slice at a time;
+    each run of complete lines is decoded and split in C, and only the
+    partial line at the slice boundary carries over. Peak memory is
+    O(chunk), not O(file) — multi-GB files stay safe even with several
+    parsing concurrently. Splitting on the newline byte before decoding
+    keeps multi-byte UTF-8 sequences intact across slice boundaries.
+    """
+    with path.open("rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            yield from f.read().decode("utf-8", errors="ignore").splitlines()
+            return
+        try:
+            size = mm.size()
+            pos = 0
+            carry = b""
+            while pos < size:
+                chunk = mm[pos : pos + _CHUNK_BYTES]
+                pos += len(chunk)
+                buf = carry + chunk
+                cut = buf.rfind(b"\n") + 1
+                if cut:
+                    yield from buf[:cut].decode("utf-8", "ignore").splitlines()
+                    carry = buf[cut:]
+                else:
+                    carry = buf
+            if carry:
+                yield from carry.decode("utf-8", "ignore").splitlines()
+        finally:
+            mm.close()
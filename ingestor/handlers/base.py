@@ -1,21 +1,31 @@
 # src/munin/parsers/base.py
 from abc import ABC, abstractmethod
-from typing import Any
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, TypedDict
 
+from dateutil import parser as dtp
 
-class NormalizedEvent(dict[str, Any]):
+
+class NormalizedEvent(TypedDict):
     """
-    Dict with normalized keys:
-    - source_path: str
-    - source_type: str (e.g., "json", "syslog", "raw")
-    - line_number: int
-    - event_time: datetime | str
-    - level: str
-    - message: str
-    - attrs: dict
-    - raw_excerpt: str
+    Normalized event shape shared by all parsers.
+
+    A TypedDict rather than a dict subclass: parsers return plain dict
+    literals (one allocation per event instead of kwargs dict + subclass
+    copy) while keeping the key schema checkable.
     """
 
+    source_path: str
+    source_type: str
+    line_number: int
+    event_time: str | None
+    level: str
+    message: str
+    attrs: dict[str, Any]
+    raw_excerpt: str
+
 
 class Parser(ABC):
     @abstractmethod
@@ -35,6 +45,32 @@ class Parser(ABC):
         """
 
 
+@lru_cache(maxsize=4096)
+def parse_timestamp(ts: str) -> str | None:
+    """
+    Raw timestamp → ISO-8601 string (or None if unparseable).
+
+    Tries the cheap format-specific paths first — fromisoformat for
+    ISO-ish stamps, strptime for classic syslog "Mon DD HH:MM:SS"
+    (year filled in from the clock, as dateutil would) — and only falls
+    back to dateutil's slow multi-format probing for oddballs. Cached:
+    busy logs emit many lines within the same second.
+    """
+    try:
+        return datetime.fromisoformat(ts).isoformat()
+    except (ValueError, TypeError):
+        pass
+    try:
+        dt = datetime.strptime(ts, "%b %d %H:%M:%S")
+        return dt.replace(year=datetime.now().year).isoformat()
+    except (ValueError, TypeError):
+        pass
+    try:
+        return dtp.parse(ts).isoformat()
+    except Exception:
+        return None
+
+
 REGISTRY: list[Parser] = []
 
 
@@ -43,13 +79,31 @@ def register(parser: Parser):
     REGISTRY.append(parser)
 
 
+# A sniff at or above this confidence wins outright; no need to ask the
+# remaining parsers.
+SNIFF_SHORT_CIRCUIT = 0.9
+
+
+@lru_cache(maxsize=1024)
+def _best_parser_cached(suffix: str, sample: str, _registry_size: int) -> Parser | None:
+    best_score = 0.0
+    best: Parser | None = None
+    for p in REGISTRY:
+        score = p.sniff(sample, suffix)
+        if score >= SNIFF_SHORT_CIRCUIT:
+            return p
+        if score > best_score:
+            best_score, best = score, p
+    return best if best_score > 0 else None
+
+
 def best_parser(sample: str, filename: str) -> Parser | None:
     """
-    Run sniff() across all registered parsers and return the highest-confidence parser.
+    Run sniff() across registered parsers and return the highest-confidence
+    parser, short-circuiting on a >= 0.9 hit. Results are cached on
+    (suffix, sample) so re-sniffing identical file heads is free.
     If all return 0, return None (caller should fall back to RawParser or quarantine).
     """
     if not REGISTRY:
         return None
-    scored = [(p.sniff(sample, filename), p) for p in REGISTRY]
-    best_score, best = max(scored, key=lambda x: x[0])
-    return best if best_score > 0 else None
+    return _best_parser_cached(Path(filename).suffix.lower(), sample, len(REGISTRY))
@@ -30,6 +30,8 @@ class EVTXHandler:
     """
 
     EVTX_MAGIC = b"ElfFile"  # EVTX header (7 bytes incl. trailing NUL usually)
+    # (offset, magic) pairs for the sniffer's O(1) magic-byte dispatch
+    MAGICS = ((0, EVTX_MAGIC),)
 
     def can_handle(self, path: Path) -> bool:
         try:
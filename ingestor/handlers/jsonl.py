@@ -1,9 +1,16 @@
 # src/munin/parsers/jsonl.py
 import json
 
-from dateutil import parser as dtp
+from .base import NormalizedEvent, Parser, parse_timestamp, register
 
-from .base import NormalizedEvent, Parser, register
+# orjson parses JSON several times faster than the stdlib; fall back
+# silently when it is not installed.
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover
+    _loads = json.loads
 
 
 class JSONLParser(Parser):
@@ -12,17 +19,19 @@ class JSONLParser(Parser):
         if not s.startswith(("{", "[")):
             return 0.0
         try:
-            obj = json.loads(sample)
+            obj = _loads(sample)
             return 0.9 if isinstance(obj, (dict, list)) else 0.0
         except Exception:
             return 0.0
 
-    def parse_line(self, line: str, line_no: int, filename: str):
+    def parse_line(
+        self, line: str, line_no: int, filename: str
+    ) -> NormalizedEvent | None:
         line = line.strip()
         if not line:
             return None
         try:
-            obj = json.loads(line)
+            obj = _loads(line)
         except Exception:
             return None
         # common fields
@@ -31,10 +40,9 @@ class JSONLParser(Parser):
             obj.get("level") or obj.get("lvl") or obj.get("severity") or ""
         ).upper()
         msg = obj.get("msg") or obj.get("message") or obj.get("event") or line[:500]
-        try:
-            event_time = dtp.parse(ts).isoformat() if ts else None
-        except Exception:
-            event_time = None
+        if not isinstance(msg, str):
+            msg = str(msg)
+        event_time = parse_timestamp(ts) if isinstance(ts, str) else None
         attrs = {
             k: v
             for k, v in obj.items()
@@ -51,16 +59,16 @@ class JSONLParser(Parser):
                 "event",
             }
         }
-        return NormalizedEvent(
-            source_path=filename,
-            source_type="jsonl",
-            line_number=line_no,
-            event_time=event_time,
-            level=level,
-            message=str(msg),
-            attrs=attrs,
-            raw_excerpt=line,
-        )
+        return {
+            "source_path": filename,
+            "source_type": "jsonl",
+            "line_number": line_no,
+            "event_time": event_time,
+            "level": level,
+            "message": msg,
+            "attrs": attrs,
+            "raw_excerpt": line,
+        }
 
 
 register(JSONLParser())
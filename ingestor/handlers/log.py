@@ -4,6 +4,7 @@ from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
 
+from ._io import read_lines
 from .registry import register
 
 logger = logging.getLogger(__name__)
@@ -42,21 +43,25 @@ class LogFileHandler:
         path = Path(file_path)
 
         try:
-            with path.open("r", encoding="utf-8", errors="ignore") as f:
-                for i, line in enumerate(f, start=1):
-                    m = LOG_LINE_RE.match(line.strip())
-                    if not m:
-                        continue
-                    events.append(
-                        {
-                            "source": path.name,
-                            "file_type": "log",
-                            "ingest_time": ingested_at,
-                            "line_number": i,
-                            "message": m.group("msg"),
-                            "tags": m.group("level") or "",
-                        }
-                    )
+            # Stream mmap-backed chunks, split in C; hoist lookups out
+            # of the loop.
+            lines = read_lines(path)
+            match = LOG_LINE_RE.match
+            append = events.append
+            for i, line in enumerate(lines, start=1):
+                m = match(line.strip())
+                if not m:
+                    continue
+                append(
+                    {
+                        "source": path.name,
+                        "file_type": "log",
+                        "ingest_time": ingested_at,
+                        "line_number": i,
+                        "message": m.group("msg"),
+                        "tags": m.group("level") or "",
+                    }
+                )
             logger.info("Parsed %d log events from %s", len(events), path.name)
         except Exception as exc:
             logger.error(
@@ -1,16 +1,18 @@
 # src/munin/parsers/plaintext.py
 import re
 
-from dateutil import parser as dtp
-
-from .base import NormalizedEvent, Parser, register
-
-TS_CAND = re.compile(
-    r"(\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:\.\d+)?Z?)|([A-Z][a-z]{2}\s+\d{1,2}\s[\d:]{8})"
+from .base import NormalizedEvent, Parser, parse_timestamp, register
+
+# All four field patterns fused into one alternation so a line is
+# scanned once instead of four times; (?i:...) keeps case-insensitivity
+# scoped to the level/user branches like the old separate patterns.
+SCAN_RE = re.compile(
+    r"(?P<ts>\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:\.\d+)?Z?"
+    r"|[A-Z][a-z]{2}\s+\d{1,2}\s[\d:]{8})"
+    r"|\b(?i:(?P<level>DEBUG|INFO|WARN|WARNING|ERROR|CRITICAL|FATAL))\b"
+    r"|\b(?P<ip>(?:\d{1,3}\.){3}\d{1,3})\b"
+    r"|(?i:user(?:name)?)=(?P<user>[^ \]]+)"
 )
-LEVEL_RE = re.compile(r"\b(DEBUG|INFO|WARN|WARNING|ERROR|CRITICAL|FATAL)\b", re.I)
-IP_RE = re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b")
-USER_RE = re.compile(r"user[name]?=([^ \]]+)", re.I)
 
 
 class PlainTextParser(Parser):
@@ -18,38 +20,42 @@ class PlainTextParser(Parser):
         # default fallback; give low confidence
         return 0.3
 
-    def parse_line(self, line: str, line_no: int, filename: str):
+    def parse_line(
+        self, line: str, line_no: int, filename: str
+    ) -> NormalizedEvent | None:
         s = line.strip()
         if not s:
             return None
-        ts = None
-        m = TS_CAND.search(s)
-        if m:
-            try:
-                ts = dtp.parse(m.group(0)).isoformat()
-            except Exception:
-                ts = None
-        level = ""
-        ml = LEVEL_RE.search(s)
-        if ml:
-            level = ml.group(1).upper()
+        ts_raw = level = ip = user = None
+        for m in SCAN_RE.finditer(s):
+            g = m.lastgroup
+            if g == "ts":
+                ts_raw = ts_raw or m.group("ts")
+            elif g == "level":
+                level = level or m.group("level")
+            elif g == "ip":
+                ip = ip or m.group("ip")
+            elif g == "user":
+                user = user or m.group("user")
+            if ts_raw and level and ip and user:
+                break
+        ts = parse_timestamp(ts_raw) if ts_raw else None
+        level = level.upper() if level else ""
         attrs = {}
-        ip = IP_RE.search(s)
-        user = USER_RE.search(s)
         if ip:
-            attrs["ip"] = ip.group(0)
+            attrs["ip"] = ip
         if user:
-            attrs["user"] = user.group(1)
-        return NormalizedEvent(
-            source_path=filename,
-            source_type="txt",
-            line_number=line_no,
-            event_time=ts,
-            level=level,
-            message=s[:500],
-            attrs=attrs,
-            raw_excerpt=s,
-        )
+            attrs["user"] = user
+        return {
+            "source_path": filename,
+            "source_type": "txt",
+            "line_number": line_no,
+            "event_time": ts,
+            "level": level,
+            "message": s[:500],
+            "attrs": attrs,
+            "raw_excerpt": s,
+        }
 
 
 register(PlainTextParser())
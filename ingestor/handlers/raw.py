@@ -1,8 +1,10 @@
 import logging
+from collections.abc import Iterator
 from datetime import UTC, datetime
 from pathlib import Path
 from typing import Any
 
+from ._io import read_lines
 from .registry import register
 
 logger = logging.getLogger(__name__)
@@ -15,39 +17,55 @@ class RawHandler:
     Reads the file as plain text, line by line.
     """
 
+    # Fallback: sniff it last so real handlers get first crack
+    SNIFF_PRIOR = 0.0
+
     def sniff(self, sample: str, filename: str) -> float:
         """
         Always return low confidence, since RawHandler is fallback.
         """
         return 0.1
 
-    def parse(self, file_path: str) -> list[dict[str, Any]]:
-        events: list[dict[str, Any]] = []
+    def iter_parse(self, file_path: str) -> Iterator[dict[str, Any]]:
+        """
+        Yield events one at a time so callers can batch inserts without
+        holding a whole multi-GB file's worth of dicts in memory.
+        """
         ingested_at = datetime.now(UTC).isoformat()
-
         path = Path(file_path)
-        if not path.exists():
-            logger.warning("File does not exist: %s", file_path)
-            return events
 
+        # Per-file invariants live in one template dict; each event is a
+        # C-level copy plus two inserts instead of six fresh key inserts.
+        template = {
+            "source": path.name,
+            "file_type": path.suffix.lower() or "raw",
+            "ingest_time": ingested_at,
+            "line_number": 0,
+            "message": "",
+            "tags": "",
+        }
+        copy = template.copy
+        count = 0
         try:
-            with path.open("r", encoding="utf-8", errors="ignore") as f:
-                for i, line in enumerate(f, start=1):
-                    line = line.strip()
-                    if not line:
-                        continue
-                    events.append(
-                        {
-                            "source": path.name,
-                            "file_type": path.suffix.lower() or "raw",
-                            "ingest_time": ingested_at,
-                            "line_number": i,
-                            "message": line,
-                            "tags": "",
-                        }
-                    )
-            logger.info("Parsed %d events from %s", len(events), path.name)
+            # mmap-backed read: decode + newline split run per bounded
+            # chunk in C instead of per-line text-mode iteration, with
+            # memory flat regardless of file size.
+            for i, line in enumerate(read_lines(path), start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                ev = copy()
+                ev["line_number"] = i
+                ev["message"] = line
+                count += 1
+                yield ev
+            logger.info("Parsed %d events from %s", count, path.name)
+        except FileNotFoundError:
+            # No stat() preflight: let open() tell us, avoiding an extra
+            # syscall per file and the stat/open race.
+            logger.warning("File does not exist: %s", file_path)
         except Exception as exc:
             logger.error("RawHandler failed on %s: %s", file_path, exc, exc_info=True)
 
-        return events
+    def parse(self, file_path: str) -> list[dict[str, Any]]:
+        return list(self.iter_parse(file_path))
@@ -25,6 +25,7 @@ Example:
 """
 
 import logging
+from functools import lru_cache
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -32,6 +33,44 @@ logger = logging.getLogger(__name__)
 # Global handler registry: maps extension name → handler class
 REGISTRY: dict[str, type] = {}
 
+# A sniff at or above this confidence wins outright.
+SNIFF_CONFIDENT = 0.9
+
+# Handler singletons: handlers are stateless, so instantiating one per
+# sniff/lookup is pure allocation churn.
+_instances: dict[type, object] = {}
+
+# (name, handler) pairs ordered by descending SNIFF_PRIOR class attr;
+# rebuilt lazily when the registry grows.
+_ranked: tuple[tuple[str, object], ...] = ()
+_ranked_for = -1
+
+
+def handler_instance(cls: type):
+    """Return the shared instance for a handler class."""
+    inst = _instances.get(cls)
+    if inst is None:
+        inst = _instances[cls] = cls()
+    return inst
+
+
+def ranked_handlers() -> tuple[tuple[str, object], ...]:
+    """
+    Handler singletons in descending sniff-priority order, so likely
+    matches are asked first and short-circuiting pays off.
+    """
+    global _ranked, _ranked_for
+    if _ranked_for != len(REGISTRY):
+        _ranked = tuple(
+            (name, handler_instance(cls))
+            for name, cls in sorted(
+                REGISTRY.items(),
+                key=lambda kv: -getattr(kv[1], "SNIFF_PRIOR", 0.5),
+            )
+        )
+        _ranked_for = len(REGISTRY)
+    return _ranked
+
 
 def register(name: str):
     """
@@ -49,6 +88,15 @@ def register(name: str):
     return decorator
 
 
+@lru_cache(maxsize=256)
+def _resolve_handler_cls(ext: str, _registry_size: int) -> type:
+    """Extension -> handler class, memoized (keyed on registry size so a
+    late registration invalidates stale fallbacks)."""
+    from ingestor.handlers.raw import RawHandler  # local import to avoid cycles
+
+    return REGISTRY.get(ext) or REGISTRY.get("raw") or RawHandler
+
+
 def get_handler_for(path: Path):
     """
     Look up a handler for the given file path by extension,
@@ -56,41 +104,41 @@ def get_handler_for(path: Path):
     """
     from ingestor.handlers.raw import RawHandler  # local import to avoid cycles
 
-    ext = path.suffix.lower().lstrip(".") or "raw"
-    handler_cls = REGISTRY.get(ext, REGISTRY.get("raw", RawHandler))
-    handler = handler_cls()
+    ext = path.suffix[1:].lower() or "raw"
+    handler = handler_instance(_resolve_handler_cls(ext, len(REGISTRY)))
 
     if hasattr(handler, "can_handle"):
         try:
             if not handler.can_handle(path):
-                return RawHandler()
+                return handler_instance(RawHandler)
         except Exception as e:
             logger.warning("can_handle check failed for %s: %s", handler, e)
-            return RawHandler()
+            return handler_instance(RawHandler)
 
     return handler
 
 
 def sniff_best_handler(sample: str, filename: str) -> object | None:
     """
-    Iterate all registered handlers, ask each for a confidence score,
-    and return the handler instance with the highest score.
+    Ask registered handlers for a confidence score in priority order and
+    return the best one, short-circuiting on a confident (>= 0.9) match.
     """
     from ingestor.handlers.raw import RawHandler
 
     best_score = 0.0
     best_handler: object | None = None
 
-    for name, handler_cls in REGISTRY.items():
-        handler = handler_cls()
+    for name, handler in ranked_handlers():
         sniff = getattr(handler, "sniff", None)
         if sniff:
             try:
                 score = sniff(sample, filename)
+                if score >= SNIFF_CONFIDENT:
+                    return handler
                 if score > best_score:
                     best_score, best_handler = score, handler
             except Exception as e:
                 logger.debug("Sniff failed for %s: %s", name, e)
 
     # Always guarantee *something*
-    return best_handler or RawHandler()
+    return best_handler or handler_instance(RawHandler)
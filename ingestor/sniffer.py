@@ -1,68 +1,99 @@
 import logging
 from pathlib import Path
 
-from ingestor.handlers.evtx import EVTXHandler
+from ingestor.handlers.evtx import EVTXHandler  # noqa: F401  (registers handler)
 from ingestor.handlers.raw import RawHandler  # fallback
-from ingestor.handlers.registry import REGISTRY
+from ingestor.handlers.registry import (
+    REGISTRY,
+    SNIFF_CONFIDENT,
+    handler_instance,
+    ranked_handlers,
+)
 
 logger = logging.getLogger(__name__)
 
 
+SNIFF_HEAD_BYTES = 8192
+
+# Selection cache keyed by (suffix, first bytes of the head): rotated
+# logs share format but not filename, so after the first file of a
+# format the rest of the directory resolves without re-sniffing.
+SNIFF_FP_BYTES = 128
+_FP_CACHE_MAX = 1024
+_fp_cache: dict[tuple[str, bytes], object] = {}
+
+
+def _remember(fp: tuple[str, bytes], handler):
+    if len(_fp_cache) >= _FP_CACHE_MAX:
+        _fp_cache.clear()
+    _fp_cache[fp] = handler
+    return handler
+
+
 def sniff_file(path: Path, sample_size: int = 5):
     """
     Pick the best handler for the given file.
-    - Reads the first `sample_size` lines as a sample.
+    - Reads one binary head block; handlers declaring (offset, magic)
+      pairs in a MAGICS class attribute get zero-copy O(1) dispatch.
+    - Otherwise decodes the first `sample_size` lines as a sample.
     - Returns a handler instance.
     """
     try:
         with path.open("rb") as bf:
-            magic = bf.read(7)
-        if magic == EVTXHandler.EVTX_MAGIC:
-            return EVTXHandler()
+            head = bf.read(SNIFF_HEAD_BYTES)
     except Exception:
-        pass
+        head = b""
 
-    try:
-        sample_lines = []
-        with path.open("r", encoding="utf-8", errors="ignore") as f:
-            for _ in range(sample_size):
-                line = f.readline()
-                if not line:
-                    break
-                sample_lines.append(line.strip())
+    fp = (path.suffix.lower(), head[:SNIFF_FP_BYTES])
+    cached = _fp_cache.get(fp)
+    if cached is not None:
+        return cached
 
+    hv = memoryview(head)
+    for handler_cls in REGISTRY.values():
+        for offset, magic in getattr(handler_cls, "MAGICS", ()):
+            if hv[offset : offset + len(magic)] == magic:
+                return _remember(fp, handler_instance(handler_cls))
+
+    try:
+        sample_lines = [
+            ln.strip()
+            for ln in head.decode("utf-8", errors="ignore").splitlines()[:sample_size]
+        ]
         sample_text = "\n".join(sample_lines)
 
-        best_handler_cls: type | None = None
+        best_handler = None
         best_conf = 0.0
 
-        # Let each registered handler sniff
-        for name, handler_cls in REGISTRY.items():
-            handler = handler_cls()
+        # Ask handlers in priority order; a confident hit skips the rest
+        for name, handler in ranked_handlers():
             if hasattr(handler, "sniff"):
                 try:
                     conf = handler.sniff(sample_text, str(path))
+                    if conf >= SNIFF_CONFIDENT:
+                        best_handler, best_conf = handler, conf
+                        break
                     if conf > best_conf:
                         best_conf = conf
-                        best_handler_cls = handler_cls
+                        best_handler = handler
                 except Exception as e:
                     logger.debug(
                         "Handler %s sniff failed on %s: %s", name, path.name, e
                     )
 
-        if best_handler_cls:
+        if best_handler:
             logger.debug(
                 "Sniffer selected %s for %s (conf=%.2f)",
-                best_handler_cls.__name__,
+                type(best_handler).__name__,
                 path.name,
                 best_conf,
             )
-            return best_handler_cls()
+            return _remember(fp, best_handler)
 
         # Fallback: file had content but no handler matched → RawHandler
         if sample_text:
             logger.debug("No handler matched %s; falling back to RawHandler", path.name)
-            return RawHandler()
+            return _remember(fp, handler_instance(RawHandler))
 
         # If the file was empty/unreadable, return None → quarantine
         logger.warning("Could not read %s; returning None (quarantine)", path.name)
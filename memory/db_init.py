@@ -24,6 +24,16 @@ def init_db(db_path: str = DB_PATH) -> None:
         # Connect to the SQLite database (this will create the file if it doesn't exist)
         conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
+        # Append-heavy ingest tuning: WAL turns per-insert fsyncs into
+        # group commit, NORMAL skips the redundant fsync under WAL, and a
+        # bounded journal keeps the -wal file from growing without limit.
+        # Writers should batch inserts via executemany inside one
+        # transaction rather than committing row by row.
+        cursor.execute("PRAGMA journal_mode=WAL;")
+        cursor.execute("PRAGMA synchronous=NORMAL;")
+        cursor.execute("PRAGMA temp_store=MEMORY;")
+        cursor.execute("PRAGMA mmap_size=268435456;")
+        cursor.execute("PRAGMA journal_size_limit=67108864;")
         # Create the events table with the specified schema, if it doesn't already exist
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS events (
@@ -5,6 +5,13 @@ import hashlib
 import json
 from typing import Any
 
+# Idempotency hashing doesn't need a cryptographic guarantee; BLAKE3 is
+# 3-10x faster than SHA-256 when installed, with sha256 as the fallback.
+try:
+    from blake3 import blake3 as _new_hash  # type: ignore
+except ImportError:  # pragma: no cover
+    _new_hash = hashlib.sha256
+
 # Support both "package" and "flat script" imports
 try:  # when imported as part of a package (e.g., munin.normalize)
     from .parsers import REGISTRY  # type: ignore
@@ -16,23 +23,32 @@ def choose_parser(sample: str, filename: str):
     """Pick the highest-confidence parser from the registry."""
     if not REGISTRY:
         raise RuntimeError("No parsers registered")
-    scored = sorted(
-        ((p.sniff(sample, filename), p) for p in REGISTRY),
-        key=lambda x: x[0],
-        reverse=True,
-    )
-    return scored[0][1]
+    # Single pass instead of sorted()[0]: no list materialization, and a
+    # confident sniff (>= 0.9) wins without asking the remaining parsers.
+    best = REGISTRY[0]
+    best_score = -1.0
+    for p in REGISTRY:
+        score = p.sniff(sample, filename)
+        if score >= 0.9:
+            return p
+        if score > best_score:
+            best_score, best = score, p
+    return best
 
 
 def content_hash(ev: dict[str, Any]) -> str:
     """Stable hash for idempotency."""
-    key = {
-        "source_path": ev.get("source_path"),
-        "event_time": ev.get("event_time"),
-        "level": ev.get("level"),
-        "message": ev.get("message"),
-        "attrs": ev.get("attrs"),
-    }
-    return hashlib.sha256(
-        json.dumps(key, sort_keys=True, default=str).encode("utf-8")
-    ).hexdigest()
+    # Feed the identity fields straight to the hasher, separator-delimited,
+    # so no intermediate JSON/key string is built per event.
+    h = _new_hash()
+    update = h.update
+    for k in ("source_path", "event_time", "level", "message"):
+        v = ev.get(k)
+        update(b"\x1f")
+        if v is not None:
+            update(str(v).encode("utf-8", "surrogatepass"))
+    attrs = ev.get("attrs")
+    if attrs:
+        update(b"\x1f")
+        update(json.dumps(attrs, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
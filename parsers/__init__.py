@@ -1,21 +1,20 @@
-# Import parser modules for their side effects (they register themselves).
-# Mark as intentionally unused to satisfy Ruff.
-from . import csvlog as _csvlog  # noqa: F401
-from . import jsonl as _jsonl  # noqa: F401
-from . import plaintext as _plaintext  # noqa: F401
-from . import syslog as _syslog  # noqa: F401
-
-# Explicit re-exports for library users.
-from .base import (
+# Thin compatibility shim: the parser implementations live in
+# ingestor.handlers and register themselves exactly once there. Importing
+# them through this package must not create a second registry, so we
+# re-export the single source instead of duplicating the modules.
+from ingestor.handlers import jsonl as _jsonl  # noqa: F401  (registers parser)
+from ingestor.handlers import plaintext as _plaintext  # noqa: F401
+from ingestor.handlers import syslog as _syslog  # noqa: F401
+from ingestor.handlers.base import (
     REGISTRY as REGISTRY,
 )
-from .base import (
+from ingestor.handlers.base import (
     NormalizedEvent as NormalizedEvent,
 )
-from .base import (
+from ingestor.handlers.base import (
     Parser as Parser,
 )
-from .base import (
+from ingestor.handlers.base import (
     register as register,
 )
 
@@ -1,23 +1,52 @@
+import fnmatch
+import gzip
+import hashlib
 import logging
+import mmap
 import os
+import queue
+import re
 import shutil
 import sqlite3
 import threading
 import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 
 import requests
+from urllib3.util.retry import Retry
 from watchdog.events import FileSystemEventHandler
 
+try:
+    import orjson
+
+    def _dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:  # pragma: no cover
+    import json
+
+    def _dumps_bytes(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode()
+
+
 from ingestor.handlers.raw import RawHandler
 from ingestor.handlers.registry import get_handler_for
 from ingestor.sniffer import sniff_file
 
 # -----------------------
-# Watchdog observer selection (polling is more reliable on Docker/Windows bind mounts)
+# Watchdog observer selection. Polling stats every file every interval
+# (O(files) per tick) but is the only thing that works on Docker/Windows
+# bind mounts, so WATCH_USE_POLLING still forces it either way; when the
+# env var is unset, prefer the native observer (inotify on Linux, O(1)
+# per event) wherever the kernel exposes it.
 # -----------------------
-USE_POLLING = os.getenv("WATCH_USE_POLLING", "1").lower() in ("1", "true", "yes")
+_polling_env = os.getenv("WATCH_USE_POLLING")
+if _polling_env is not None:
+    USE_POLLING = _polling_env.lower() in ("1", "true", "yes")
+else:
+    USE_POLLING = not os.path.exists("/proc/sys/fs/inotify")
 if USE_POLLING:
     from watchdog.observers.polling import PollingObserver as Observer
 
@@ -53,10 +82,68 @@ RETRY_INTERVAL_SEC = int(os.getenv("RETRY_INTERVAL_SEC", "3"))
 RETRY_BATCH_SIZE = int(os.getenv("RETRY_BATCH_SIZE", "500"))
 FILE_STABLE_WAIT = 0.5
 
+# PollingObserver rescan cadence; each scan stats the whole directory,
+# so busy deployments can trade latency for less stat churn.
+WATCH_POLL_INTERVAL = float(os.getenv("WATCH_POLL_INTERVAL", "1.0"))
+
+# Only filenames matching this glob are ingested (editors and shippers
+# drop temp files like .swp/.part into watched directories). Compiled
+# once: fnmatch.fnmatch would re-probe its pattern cache on every
+# event.
+WATCH_GLOB = os.getenv("WATCH_GLOB", "*")
+_glob_match = re.compile(fnmatch.translate(WATCH_GLOB)).match
+
+# Files parsed concurrently when draining a startup backlog.
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(os.cpu_count() or 4)))
+
+# Files queued for processing before watchdog callbacks block
+# (backpressure instead of unbounded memory growth).
+WORK_QUEUE_MAX = int(os.getenv("WORK_QUEUE_MAX", "256"))
+
+# Bodies at or above this size are gzipped before POSTing to the API.
+GZIP_MIN_BYTES = 1024
+
 
 # -----------------------
 # SQLite queue
 # -----------------------
+# One connection per thread, reused across calls: opening a connection
+# costs a stat + header read + pragma replay, which the old
+# connect-per-call helpers paid on every batch. WAL (see init_db) lets
+# the worker's writes proceed concurrently with the retry thread's
+# reads.
+_tls = threading.local()
+
+
+def get_conn() -> sqlite3.Connection:
+    conn = getattr(_tls, "conn", None)
+    if conn is None:
+        # A larger statement cache keeps every hot SQL shape (the two
+        # VALUES-group inserts, fetch, delete, manifest lookups)
+        # permanently prepared, so sqlite3 skips the parser on reuse.
+        conn = _tls.conn = sqlite3.connect(DB_PATH, cached_statements=256)
+        # Same tuning as the API DB: WAL commits without rewriting pages
+        # into a rollback journal and lets readers run during writes;
+        # NORMAL drops the per-commit fsync WAL makes redundant.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-64000")
+        # Writers queue behind each other instead of erroring: the
+        # default 5 s is too tight when several backlog workers commit
+        # large files back to back, and a timeout here misclassifies a
+        # healthy file as a parse failure (it gets quarantined).
+        conn.execute("PRAGMA busy_timeout=60000")
+    return conn
+
+
+def _ensure_dirs() -> None:
+    """Create the working directories once, at startup — not per file."""
+    for d in (INCOMING_DIR, PROCESSING_DIR, QUARANTINE_DIR, DATA_DIR):
+        d.mkdir(parents=True, exist_ok=True)
+
+
 def init_db() -> None:
     DATA_DIR.mkdir(parents=True, exist_ok=True)
     conn = sqlite3.connect(DB_PATH)
@@ -80,80 +167,165 @@ def init_db() -> None:
             quarantined_at TEXT NOT NULL
         )
     """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS ingested_files (
+            sha256 TEXT PRIMARY KEY,
+            filename TEXT NOT NULL,
+            bytes INTEGER NOT NULL,
+            ingested_at TEXT NOT NULL
+        )
+    """)
+    # Migrations: these columns landed after their tables; SQLite has no
+    # ADD COLUMN IF NOT EXISTS.
+    try:
+        cur.execute("ALTER TABLE ingested_files ADD COLUMN sha256_head TEXT")
+    except sqlite3.OperationalError:
+        pass
+    try:
+        cur.execute("ALTER TABLE pending_events ADD COLUMN event_json BLOB")
+    except sqlite3.OperationalError:
+        pass
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_ingested_head "
+        "ON ingested_files (bytes, sha256_head)"
+    )
+    cur.execute(
+        "CREATE INDEX IF NOT EXISTS idx_quarantine_filename "
+        "ON quarantine_index (filename)"
+    )
     conn.commit()
     conn.close()
 
 
-def buffer_events(events: list[dict[str, Any]]) -> None:
+# Multi-row VALUES groups: one prepared statement inserts up to
+# _INSERT_GROUP rows per sqlite3_step, instead of executemany's
+# step-per-row. 6 params x 500 rows stays well under SQLite's variable
+# limit. SQL strings are cached per group size (only two ever exist in
+# steady state: the full group and the final remainder).
+_INSERT_GROUP = 500
+_INSERT_PREFIX = (
+    "INSERT INTO pending_events "
+    "(source, file_type, ingest_time, line_number, message, tags, event_json) VALUES "
+)
+_insert_sql_cache: dict[int, str] = {}
+
+
+def _insert_pending(conn: sqlite3.Connection, events: list[dict[str, Any]]) -> None:
+    for start in range(0, len(events), _INSERT_GROUP):
+        chunk = events[start : start + _INSERT_GROUP]
+        sql = _insert_sql_cache.get(len(chunk))
+        if sql is None:
+            sql = _insert_sql_cache[len(chunk)] = _INSERT_PREFIX + ",".join(
+                ("(?,?,?,?,?,?,?)",) * len(chunk)
+            )
+        flat: list[Any] = []
+        extend = flat.extend
+        for e in chunk:
+            extend(
+                (
+                    e["source"],
+                    e["file_type"],
+                    e["ingest_time"],
+                    e["line_number"],
+                    e["message"],
+                    e["tags"],
+                    # Serialized once here; every retry cycle reuses the
+                    # bytes instead of rebuilding and re-encoding the
+                    # event.
+                    _dumps_bytes(e),
+                )
+            )
+        conn.execute(sql, flat)
+
+
+def buffer_events(events: list[dict[str, Any]], conn: sqlite3.Connection | None = None) -> None:
+    """Insert events into the pending queue.
+
+    With an explicit connection the rows join the caller's open
+    transaction (no commit here); otherwise a short-lived connection
+    commits immediately.
+    """
     if not events:
         return
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.executemany(
-        """
-        INSERT INTO pending_events (source, file_type, ingest_time, line_number, message, tags)
-        VALUES (:source, :file_type, :ingest_time, :line_number, :message, :tags)
-    """,
-        events,
-    )
+    if conn is not None:
+        _insert_pending(conn, events)
+        return
+    conn = get_conn()
+    _insert_pending(conn, events)
     conn.commit()
-    conn.close()
 
 
-def fetch_pending_batch(limit: int) -> list[dict[str, Any]]:
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
+def fetch_pending_batch(limit: int, after_id: int = 0) -> list[sqlite3.Row]:
+    cur = get_conn().execute(
         """
-        SELECT id, source, file_type, ingest_time, line_number, message, tags
+        SELECT id, source, file_type, ingest_time, line_number, message, tags, event_json
         FROM pending_events
+        WHERE id > ?
         ORDER BY id ASC
         LIMIT ?
     """,
-        (limit,),
+        (after_id, limit),
     )
-    rows = cur.fetchall()
-    conn.close()
-    keys = [
-        "id",
-        "source",
-        "file_type",
-        "ingest_time",
-        "line_number",
-        "message",
-        "tags",
-    ]
-    return [dict(zip(keys, row, strict=False)) for row in rows]
+    # sqlite3.Row gives keyed access over the fetched tuples directly —
+    # no per-row dict build (and no keys/zip allocation) per batch.
+    cur.row_factory = sqlite3.Row
+    return cur.fetchall()
 
 
 def delete_pending_ids(ids: list[int]) -> None:
     if not ids:
         return
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.executemany("DELETE FROM pending_events WHERE id = ?", [(i,) for i in ids])
+    conn = get_conn()
+    # One statement, one commit, and — unlike expanded ?,?,... lists,
+    # which produce a distinct SQL string per batch size — a single plan
+    # that stays in the statement cache: the ids travel as one JSON
+    # parameter unpacked by json_each.
+    conn.execute(
+        "DELETE FROM pending_events WHERE id IN (SELECT value FROM json_each(?))",
+        (_dumps_bytes(list(ids)).decode(),),
+    )
     conn.commit()
-    conn.close()
 
 
 def add_quarantine_index(filename: str, reason: str) -> None:
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute(
+    conn = get_conn()
+    conn.execute(
         "INSERT INTO quarantine_index (filename, reason, quarantined_at) VALUES (?, ?, datetime('now'))",
         (filename, reason),
     )
     conn.commit()
-    conn.close()
 
 
 # -----------------------
 # API send
 # -----------------------
-def send_batch_to_api(batch_rows: list[dict[str, Any]]) -> None:
-    if not batch_rows:
-        return
-    events = [
+# One keep-alive session for all posts: connection (and TLS handshake,
+# when the API is https) is paid once per pool slot instead of per
+# batch. Transient failures (connection resets, 429/5xx) retry with
+# exponential backoff inside urllib3, reusing the pooled socket; the
+# retry_worker loop above this only has to handle durable outages.
+_session = requests.Session()
+_adapter = requests.adapters.HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 502, 503, 504],
+        allowed_methods={"POST"},
+    ),
+)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+
+
+def _event_json(r: sqlite3.Row) -> bytes:
+    """Stored pre-serialized bytes, or (for rows buffered before the
+    event_json column existed) a one-off encode of the row fields."""
+    ej = r["event_json"]
+    if ej is not None:
+        return ej
+    return _dumps_bytes(
         {
             "source": r["source"],
             "file_type": r["file_type"],
@@ -162,15 +334,36 @@ def send_batch_to_api(batch_rows: list[dict[str, Any]]) -> None:
             "message": r["message"],
             "tags": r["tags"],
         }
-        for r in batch_rows
-    ]
-    payload = {
+    )
+
+
+def send_batch_to_api(batch_rows: list[sqlite3.Row]) -> None:
+    if not batch_rows:
+        return
+    header = {
         "source": SOURCE_NAME,
-        "file_type": events[0].get("file_type", "unknown"),
-        "ingest_time": events[0].get("ingest_time"),
-        "events": events,
+        "file_type": batch_rows[0]["file_type"] or "unknown",
+        "ingest_time": batch_rows[0]["ingest_time"],
     }
-    response = requests.post(INGEST_API_URL, json=payload, timeout=10)
+    # Splice the pre-serialized event blobs into the envelope instead of
+    # re-encoding every event on every retry cycle: the header minus its
+    # closing brace, then the events joined as a JSON array.
+    body = b'%s,"events":[%s]}' % (
+        _dumps_bytes(header)[:-1],
+        b",".join(_event_json(r) for r in batch_rows),
+    )
+    headers = {"Content-Type": "application/json"}
+    # Log text gzips 5-10x; past a small threshold the compression CPU
+    # is cheaper than the extra bytes on the wire. Tiny bodies go as-is.
+    if len(body) >= GZIP_MIN_BYTES:
+        body = gzip.compress(body, compresslevel=3)
+        headers["Content-Encoding"] = "gzip"
+    response = _session.post(
+        INGEST_API_URL,
+        data=body,
+        headers=headers,
+        timeout=10,
+    )
     response.raise_for_status()
 
 
@@ -178,88 +371,330 @@ def send_batch_to_api(batch_rows: list[dict[str, Any]]) -> None:
 # Retry worker
 # -----------------------
 def retry_worker(stop_evt: threading.Event) -> None:
-    while not stop_evt.is_set():
-        try:
-            batch = fetch_pending_batch(RETRY_BATCH_SIZE)
-            if not batch:
+    # One-slot pipeline: while a POST is in flight on the sender thread,
+    # this thread fetches the next batch (ids past the in-flight rows)
+    # so the socket and the DB stay busy at the same time. Rows are only
+    # deleted after their POST succeeds; on failure the prefetched batch
+    # is dropped and the loop refetches from the head.
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="retry-send") as sender:
+        batch: list[sqlite3.Row] = []
+        while not stop_evt.is_set():
+            try:
+                if not batch:
+                    batch = fetch_pending_batch(RETRY_BATCH_SIZE)
+                if not batch:
+                    time.sleep(RETRY_INTERVAL_SEC)
+                    continue
+                in_flight = sender.submit(send_batch_to_api, batch)
+                next_batch = fetch_pending_batch(
+                    RETRY_BATCH_SIZE, after_id=batch[-1]["id"]
+                )
+                in_flight.result()
+                delete_pending_ids([r["id"] for r in batch])
+                logger.info("Successfully flushed %d events", len(batch))
+                batch = next_batch
+            except requests.RequestException as rexc:
+                logger.warning("Network/API error during retry: %s", rexc)
+                batch = []
+                time.sleep(RETRY_INTERVAL_SEC)
+            except Exception as exc:
+                logger.error("Unexpected error in retry_worker: %s", exc, exc_info=True)
+                batch = []
                 time.sleep(RETRY_INTERVAL_SEC)
-                continue
-            send_batch_to_api(batch)
-            delete_pending_ids([r["id"] for r in batch])
-            logger.info("Successfully flushed %d events", len(batch))
-        except requests.RequestException as rexc:
-            logger.warning("Network/API error during retry: %s", rexc)
-            time.sleep(RETRY_INTERVAL_SEC)
-        except Exception as exc:
-            logger.error("Unexpected error in retry_worker: %s", exc, exc_info=True)
-            time.sleep(RETRY_INTERVAL_SEC)
+
+
+# -----------------------
+# File-level dedup
+# -----------------------
+# Above this size fall back to chunked reads rather than mapping the
+# whole file into the address space at once.
+_HASH_MMAP_MAX = 512 << 20
+
+
+def sha256_file(path: Path, bufsize: int = 1 << 20) -> str:
+    """Full-file SHA-256 (hashlib dispatches through OpenSSL EVP, so the
+    compression function uses SHA-NI where the CPU has it).
+
+    Files up to 512 MiB are mmapped and hashed in a single update — one
+    contiguous buffer, no per-chunk bytes allocations, one GIL release —
+    with a chunked-read fallback for empty/huge files and filesystems
+    that cannot mmap.
+    """
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if 0 < size <= _HASH_MMAP_MAX:
+            try:
+                with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mm:
+                    h.update(mm)
+                return h.hexdigest()
+            except (ValueError, OSError):
+                pass
+        while chunk := f.read(bufsize):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# Bytes hashed by the duplicate prefilter; files at or under this size
+# are covered entirely by the head hash.
+HEAD_HASH_BYTES = 65536
+
+
+def sha256_head(path: Path, n: int = HEAD_HASH_BYTES) -> str:
+    """Hash of the first n bytes — the cheap half of the dedup check."""
+    with path.open("rb") as f:
+        return hashlib.sha256(f.read(n)).hexdigest()
+
+
+def manifest_head_matches(size: int, head: str) -> list[str]:
+    """Full hashes of manifest rows sharing this (size, head hash)."""
+    rows = get_conn().execute(
+        "SELECT sha256 FROM ingested_files WHERE bytes = ? AND sha256_head = ?",
+        (size, head),
+    ).fetchall()
+    return [r[0] for r in rows]
+
+
+def record_ingested_file(
+    sha256: str,
+    filename: str,
+    size: int,
+    head: str,
+    conn: sqlite3.Connection | None = None,
+) -> None:
+    sql = (
+        "INSERT OR IGNORE INTO ingested_files "
+        "(sha256, filename, bytes, sha256_head, ingested_at) "
+        "VALUES (?, ?, ?, ?, datetime('now'))"
+    )
+    params = (sha256, filename, size, head)
+    if conn is not None:
+        conn.execute(sql, params)
+        return
+    conn = get_conn()
+    conn.execute(sql, params)
+    conn.commit()
 
 
 # -----------------------
 # Helpers
 # -----------------------
+def move_file(src: Path, dst: Path) -> None:
+    """
+    Move with the cheapest mechanism available: os.replace (an atomic
+    rename, constant-time on the same filesystem), then a kernel-side
+    copy_file_range for cross-device moves (no userspace byte shuffling;
+    a CoW clone on reflink filesystems), and finally shutil.move for
+    platforms without either.
+    """
+    try:
+        os.replace(src, dst)
+        return
+    except OSError:
+        pass
+    try:
+        with open(src, "rb") as s, open(dst, "wb") as d:
+            remaining = os.fstat(s.fileno()).st_size
+            while remaining > 0:
+                n = os.copy_file_range(s.fileno(), d.fileno(), remaining)
+                if n == 0:
+                    break
+                remaining -= n
+        src.unlink()
+    except (AttributeError, OSError):
+        shutil.move(str(src), str(dst))
+
+
+# Last observed (size, mtime_ns, monotonic time) per path, so repeated
+# stability checks compare against a snapshot instead of sleeping.
+_stability: dict[str, tuple[int, int, float]] = {}
+
+# Paths whose writer already closed them (IN_CLOSE_WRITE via watchdog's
+# on_closed): the kernel has vouched for quiescence, so the stability
+# wait is skipped for these.
+_closed_writes: set[str] = set()
+
+
 def is_file_stable(path: Path, wait: float = FILE_STABLE_WAIT) -> bool:
+    """
+    True when the file looks quiesced. A file whose mtime is already
+    `wait` seconds old passes immediately — the common case for files
+    moved into the directory or drained from a backlog — so the fixed
+    0.5 s sleep is only ever paid for files still being written, via the
+    caller's retry loop comparing against the recorded snapshot.
+    """
     try:
-        s1 = path.stat().st_size
-        time.sleep(wait)
-        s2 = path.stat().st_size
-        return s1 == s2
+        st = path.stat()
     except FileNotFoundError:
+        _stability.pop(str(path), None)
         return False
-
-
-def parse_file_to_events(file_path: Path) -> list[dict[str, Any]]:
+    if time.time() - st.st_mtime >= wait:
+        _stability.pop(str(path), None)
+        return True
+    key = str(path)
+    now = time.monotonic()
+    prev = _stability.get(key)
+    if (
+        prev is not None
+        and prev[0] == st.st_size
+        and prev[1] == st.st_mtime_ns
+        and now - prev[2] >= wait
+    ):
+        del _stability[key]
+        return True
+    if prev is None or prev[0] != st.st_size or prev[1] != st.st_mtime_ns:
+        _stability[key] = (st.st_size, st.st_mtime_ns, now)
+    return False
+
+
+def iter_file_events(file_path: Path) -> Iterator[dict[str, Any]]:
+    """
+    Yield events from the best handler for the file. Handlers that expose
+    iter_parse stream line-by-line; list-returning handlers are iterated
+    after the fact, so callers can batch uniformly either way.
+    """
     parser = sniff_file(file_path)
-    if parser:
-        return parser.parse(str(file_path))
-    try:
-        handler = get_handler_for(file_path)
-        return handler.parse(str(file_path))
-    except Exception:
-        return RawHandler().parse(str(file_path))
+    if not parser:
+        try:
+            parser = get_handler_for(file_path)
+        except Exception:
+            parser = RawHandler()
+    iter_parse = getattr(parser, "iter_parse", None)
+    if iter_parse is not None:
+        return iter_parse(str(file_path))
+    return iter(parser.parse(str(file_path)))
 
 
 # -----------------------
 # Watcher
 # -----------------------
 class LogHandler(FileSystemEventHandler):
+    """
+    Watchdog handler. With a work queue attached, callbacks only enqueue
+    the path (microseconds, so the observer thread never stalls behind a
+    slow parse) and a single worker thread does the stability wait,
+    parse and DB write; a full queue blocks the callback, which is the
+    backpressure we want. Without a queue, processing stays inline.
+    """
+
+    def __init__(self, work_queue: queue.Queue | None = None) -> None:
+        super().__init__()
+        self._queue = work_queue
+        # Paths enqueued but not yet processed: watchdog commonly fires
+        # several events for one file (create + moved-in + attrib), and
+        # processing the same path twice wastes a parse and logs a
+        # spurious quarantine for the second attempt.
+        self._pending: set[Path] = set()
+        self._pending_lock = threading.Lock()
+
+    def _submit(self, path: Path) -> None:
+        if _glob_match(path.name) is None:
+            return
+        if self._queue is not None:
+            with self._pending_lock:
+                if path in self._pending:
+                    return
+                self._pending.add(path)
+            self._queue.put(path)
+        else:
+            self.process_file(path)
+
+    def mark_done(self, path: Path) -> None:
+        with self._pending_lock:
+            self._pending.discard(path)
+
     def on_created(self, event) -> None:
         if not event.is_directory:
-            self.process_file(Path(event.src_path))
+            self._submit(Path(event.src_path))
 
     def on_moved(self, event) -> None:
         if not event.is_directory:
             dest_path = getattr(event, "dest_path", event.src_path)
             target = Path(dest_path)
             if target.parent == INCOMING_DIR:
-                self.process_file(target)
+                self._submit(target)
+
+    def on_closed(self, event) -> None:
+        # Native inotify delivers IN_CLOSE_WRITE: the writer's fd is
+        # closed, so the stability poll below can be skipped entirely.
+        # The polling observer never fires this. Glob-filtered paths
+        # (.swp/.part temp files) are rejected before being recorded —
+        # only process_file ever removes entries, so recording them
+        # here would leak them forever.
+        if not event.is_directory:
+            path = Path(event.src_path)
+            if _glob_match(path.name) is None:
+                return
+            _closed_writes.add(str(path))
+            self._submit(path)
 
     def process_file(self, src: Path) -> None:
-        while not is_file_stable(src):
-            time.sleep(FILE_STABLE_WAIT)
-
-        PROCESSING_DIR.mkdir(parents=True, exist_ok=True)
+        if str(src) in _closed_writes:
+            _closed_writes.discard(str(src))
+        else:
+            while not is_file_stable(src):
+                time.sleep(FILE_STABLE_WAIT)
+
+        # Working dirs are created once at startup (and by _ensure_dirs
+        # for embedded callers); re-checking per file cost a stat each.
         dest = PROCESSING_DIR / src.name
         try:
-            shutil.move(str(src), str(dest))
+            move_file(src, dest)
         except Exception as e:
             logger.error("Move failed %s → %s: %s", src, dest, e)
             return
 
         try:
-            events = parse_file_to_events(dest)
+            # Re-delivered files (agent restarts, duplicate drops) are
+            # common. Prefilter on (size, first-64KiB hash): a miss means
+            # the file is new without touching the rest of its bytes; a
+            # hit is confirmed with the full hash, except for small files
+            # where the head already covered everything.
+            size = dest.stat().st_size
+            head = sha256_head(dest)
+            file_sha: str | None = None
+            matches = manifest_head_matches(size, head)
+            if matches:
+                if size <= HEAD_HASH_BYTES:
+                    duplicate = True
+                else:
+                    file_sha = sha256_file(dest)
+                    duplicate = file_sha in matches
+                if duplicate:
+                    dest.unlink(missing_ok=True)
+                    logger.info("Skipped duplicate file %s (sha256 seen)", dest.name)
+                    return
+
+            # Parse fully before taking the write lock: with concurrent
+            # backlog workers, a BEGIN IMMEDIATE held across a whole
+            # parse serializes every other writer behind it (and, past
+            # the busy timeout, gets valid files quarantined as
+            # "locked"). The lock now only covers the inserts plus the
+            # manifest row — still one fsync for the whole file.
+            events = list(iter_file_events(dest))
             if not events:
                 raise ValueError("Parser returned no events (after sniff fallback)")
-            buffer_events(events)
+            # File pages are hot from the parse, so the full hash (when
+            # the prefilter didn't already force it) is a memory-speed
+            # pass.
+            if file_sha is None:
+                file_sha = sha256_file(dest)
+            total = len(events)
+            conn = get_conn()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                buffer_events(events, conn)
+                record_ingested_file(file_sha, dest.name, size, head, conn)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
             dest.unlink(missing_ok=True)
-            logger.info(
-                "Buffered %d events from %s; file deleted", len(events), dest.name
-            )
+            logger.info("Buffered %d events from %s; file deleted", total, dest.name)
         except Exception as e:
-            QUARANTINE_DIR.mkdir(parents=True, exist_ok=True)
             qpath = QUARANTINE_DIR / dest.name
             try:
-                shutil.move(str(dest), str(qpath))
+                move_file(dest, qpath)
                 note = qpath.with_suffix(qpath.suffix + ".note")
                 with open(note, "w", encoding="utf-8") as f:
                     f.write(f"Failed to parse {dest.name}\n")
@@ -276,20 +711,79 @@ class LogHandler(FileSystemEventHandler):
                 logger.critical("Could not quarantine %s: %s", dest, qe, exc_info=True)
 
 
+def process_worker(
+    work_queue: queue.Queue, handler: "LogHandler", stop_evt: threading.Event
+) -> None:
+    """Drain queued paths; the single consumer serializes DB writes."""
+    while not stop_evt.is_set():
+        try:
+            path = work_queue.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        try:
+            handler.process_file(path)
+        except Exception as exc:
+            logger.error("Worker failed on %s: %s", path, exc, exc_info=True)
+        finally:
+            handler.mark_done(path)
+            work_queue.task_done()
+
+
+# -----------------------
+# Embedded lifecycle (used by the API's lifespan)
+# -----------------------
+_watcher_state: dict[str, Any] = {}
+
+
+def start_watcher() -> None:
+    """Start the retry worker, processing worker, and observer as daemon
+    threads. Idempotent; pair with stop_watcher()."""
+    if _watcher_state:
+        return
+    _ensure_dirs()
+    init_db()
+    stop_evt = threading.Event()
+    retry_t = threading.Thread(target=retry_worker, args=(stop_evt,), daemon=True)
+    retry_t.start()
+    work_queue: queue.Queue = queue.Queue(maxsize=WORK_QUEUE_MAX)
+    handler = LogHandler(work_queue)
+    worker = threading.Thread(
+        target=process_worker, args=(work_queue, handler, stop_evt), daemon=True
+    )
+    worker.start()
+    observer = Observer(timeout=WATCH_POLL_INTERVAL)
+    observer.schedule(handler, str(INCOMING_DIR), recursive=False)
+    observer.start()
+    _watcher_state.update(stop_evt=stop_evt, observer=observer)
+
+
+def stop_watcher() -> None:
+    """Signal the watcher threads started by start_watcher() to exit."""
+    if not _watcher_state:
+        return
+    _watcher_state["stop_evt"].set()
+    observer = _watcher_state["observer"]
+    observer.stop()
+    observer.join(timeout=5)
+    _watcher_state.clear()
+
+
 # -----------------------
 # Main
 # -----------------------
 if __name__ == "__main__":
-    INCOMING_DIR.mkdir(parents=True, exist_ok=True)
-    PROCESSING_DIR.mkdir(parents=True, exist_ok=True)
-    QUARANTINE_DIR.mkdir(parents=True, exist_ok=True)
-
+    _ensure_dirs()
     init_db()
     stop_evt = threading.Event()
     t = threading.Thread(target=retry_worker, args=(stop_evt,), daemon=True)
     t.start()
 
-    handler = LogHandler()
+    work_queue: queue.Queue = queue.Queue(maxsize=WORK_QUEUE_MAX)
+    handler = LogHandler(work_queue)
+    worker = threading.Thread(
+        target=process_worker, args=(work_queue, handler, stop_evt), daemon=True
+    )
+    worker.start()
     logger.info(
         "Config: incoming=%s, processing=%s, quarantine=%s, db=%s",
         INCOMING_DIR,
@@ -299,14 +793,26 @@ if __name__ == "__main__":
     )
     logger.info("Watcher: using %s", OBSERVER_NAME)
 
-    observer = Observer()
+    observer = Observer(timeout=WATCH_POLL_INTERVAL)
     observer.schedule(handler, str(INCOMING_DIR), recursive=False)
     observer.start()
 
-    for fname in os.listdir(INCOMING_DIR):
-        fpath = INCOMING_DIR / fname
-        if fpath.is_file():
-            handler.process_file(fpath)
+    # Drain any backlog that accumulated while the watcher was down.
+    # Files are independent (each gets its own sqlite connection and its
+    # own move/parse/buffer), so fan out across a thread pool; mmap
+    # decode, regex matching and sqlite all release the GIL.
+    with ThreadPoolExecutor(
+        max_workers=PARSE_WORKERS, thread_name_prefix="backlog"
+    ) as pool:
+        # scandir reuses the file type readdir already returned, so the
+        # backlog scan does one getdents pass with no stat per entry.
+        with os.scandir(INCOMING_DIR) as entries:
+            for entry in entries:
+                if (
+                    _glob_match(entry.name) is not None
+                    and entry.is_file(follow_symlinks=False)
+                ):
+                    pool.submit(handler.process_file, Path(entry.path))
 
     logger.info(
         "Watching %s (buffer→delete; quarantine on parse failure)", INCOMING_DIR
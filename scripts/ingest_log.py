@@ -1,4 +1,6 @@
 import json
+import os
+import socket
 import sqlite3
 import sys
 from datetime import UTC, datetime
@@ -8,6 +10,26 @@ from api.utils.quota import enforce_quota_loop
 
 DB_PATH = Path(__file__).resolve().parents[1] / "memory" / "munin_memory.db"
 
+SOCKET_PATH = os.getenv("INGEST_SOCKET", "/tmp/munin_ingest.sock")
+
+
+def send_to_daemon(data: dict) -> bool:
+    """Hand the event to a running ingest_daemon, if there is one.
+
+    The daemon owns a long-lived tuned connection and batches commits;
+    going through it skips this process's sqlite open and quota sweep.
+    Returns False (caller falls back to the direct path) when no daemon
+    is listening.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET) as s:
+            s.settimeout(1.0)
+            s.connect(SOCKET_PATH)
+            s.send(json.dumps(data).encode())
+        return True
+    except OSError:
+        return False
+
 
 def ingest(source, level, message, ts=None):
     # run quota check before writing
@@ -40,8 +62,11 @@ if __name__ == "__main__":
     if len(sys.argv) == 2:
         # Expecting JSON: {"source": "...", "level": "...", "message": "..."}
         data = json.loads(sys.argv[1])
-        ingest(data["source"], data.get("level", "INFO"), data["message"])
-        print("Log ingested.")
+        if send_to_daemon(data):
+            print("Log queued with ingest daemon.")
+        else:
+            ingest(data["source"], data.get("level", "INFO"), data["message"])
+            print("Log ingested.")
     else:
         print(
             'Usage: python ingest_log.py \'{"source": "syslog", "level": "INFO", "message": "Test event"}\''
@@ -13,11 +13,21 @@ def db_size_bytes(db_path: str) -> int:
     return total
 
 
+def db_logical_size_bytes(conn: sqlite3.Connection) -> int:
+    """Logical DB size from the open connection: (page_count -
+    freelist_count) * page_size. No stat() syscalls, no WAL/SHM
+    accounting, and freed pages count as reclaimed immediately."""
+    (pages,) = conn.execute("PRAGMA page_count").fetchone()
+    (free,) = conn.execute("PRAGMA freelist_count").fetchone()
+    (page_size,) = conn.execute("PRAGMA page_size").fetchone()
+    return (pages - free) * page_size
+
+
 def enforce_quota(conn: sqlite3.Connection, cfg) -> tuple[bool, int]:
     """
     Returns (ok, freed_bytes). ok=False if still above high_watermark after prune.
     """
-    size = db_size_bytes(cfg.DB_PATH)
+    size = db_logical_size_bytes(conn)
     if size <= cfg.DB_HIGH_WATERMARK:
         return True, 0
 
@@ -38,7 +48,7 @@ def enforce_quota(conn: sqlite3.Connection, cfg) -> tuple[bool, int]:
     )
     conn.commit()
 
-    new_size = db_size_bytes(cfg.DB_PATH)
+    new_size = db_logical_size_bytes(conn)
     if new_size > cfg.DB_LOW_WATERMARK:
         return False, size - new_size
     return True, size - new_size
@@ -0,0 +1,80 @@
+import importlib.util
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture()
+def watcher(tmp_path, monkeypatch):
+    """Load scripts/file_watcher.py against throwaway directories.
+
+    The module reads its directory config from the environment at import
+    time, so it is loaded fresh per test under a private name.
+    """
+    for var, name in (
+        ("WATCH_DIR", "incoming"),
+        ("PROCESSING_DIR", "processing"),
+        ("QUARANTINE_DIR", "quarantine"),
+        ("DATA_DIR", "data"),
+    ):
+        monkeypatch.setenv(var, str(tmp_path / name))
+    spec = importlib.util.spec_from_file_location(
+        "file_watcher_under_test", REPO_ROOT / "scripts" / "file_watcher.py"
+    )
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    mod._ensure_dirs()
+    mod.init_db()
+    return mod
+
+
+def _drop(watcher, name: str, content: str) -> Path:
+    """Write a file into the incoming dir, aged past the stability wait."""
+    p = watcher.INCOMING_DIR / name
+    p.write_text(content)
+    old = time.time() - 10
+    os.utime(p, (old, old))
+    return p
+
+
+def test_duplicate_content_is_skipped(watcher):
+    content = "".join(f"line {i}\n" for i in range(50))
+    handler = watcher.LogHandler()
+
+    handler.process_file(_drop(watcher, "first.log", content))
+    assert len(watcher.fetch_pending_batch(1000)) == 50
+
+    # Same bytes under a new name: the (size, head-hash) prefilter hits
+    # and the file is dropped without buffering anything.
+    handler.process_file(_drop(watcher, "redelivered.log", content))
+    assert len(watcher.fetch_pending_batch(1000)) == 50
+    assert not (watcher.PROCESSING_DIR / "redelivered.log").exists()
+    assert not any(watcher.QUARANTINE_DIR.iterdir())
+
+
+def test_near_duplicate_is_ingested(watcher):
+    content = "".join(f"line {i}\n" for i in range(50))
+    handler = watcher.LogHandler()
+
+    handler.process_file(_drop(watcher, "first.log", content))
+    # Same size, one byte different: must not be treated as a duplicate.
+    altered = content.replace("line 7", "LINE 7")
+    handler.process_file(_drop(watcher, "second.log", altered))
+    assert len(watcher.fetch_pending_batch(1000)) == 100
+
+
+def test_manifest_records_ingested_file(watcher):
+    handler = watcher.LogHandler()
+    handler.process_file(_drop(watcher, "first.log", "hello\nworld\n"))
+    conn = watcher.get_conn()
+    rows = conn.execute(
+        "SELECT filename, bytes, sha256_head FROM ingested_files"
+    ).fetchall()
+    assert len(rows) == 1
+    assert rows[0][0] == "first.log"
+    assert rows[0][1] == len(b"hello\nworld\n")
+    assert rows[0][2]
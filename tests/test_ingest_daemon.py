@@ -0,0 +1,73 @@
+import json
+import socket
+import sqlite3
+import threading
+import time
+
+import pytest
+
+import scripts.ingest_daemon as daemon
+
+
+@pytest.fixture()
+def db_path(tmp_path, monkeypatch):
+    """Point both the daemon and the shared schema helper at a tmp DB."""
+    from api.utils import db
+
+    path = tmp_path / "munin_memory.db"
+    monkeypatch.setattr(db, "DB_PATH", path)
+    monkeypatch.setattr(db, "_initialized", False)
+    monkeypatch.setattr(daemon, "DB_PATH", path)
+    return path
+
+
+def test_flush_writes_batch_and_clears(db_path):
+    conn = daemon._connect()
+    batch = [
+        daemon._row({"source": "unit", "message": "a"}),
+        daemon._row({"source": "unit", "message": "b", "level": "ERROR"}),
+    ]
+    daemon._flush(conn, batch)
+    assert batch == []
+
+    rows = conn.execute(
+        "SELECT source, level, message, ingest_time_utc FROM logs ORDER BY id"
+    ).fetchall()
+    conn.close()
+    assert [(r[0], r[1], r[2]) for r in rows] == [
+        ("unit", "INFO", "a"),
+        ("unit", "ERROR", "b"),
+    ]
+    assert all(r[3] for r in rows)
+
+
+def test_serve_batches_frames_from_socket(db_path, tmp_path, monkeypatch):
+    monkeypatch.setattr(daemon, "BATCH_WAIT_SEC", 0.05)
+    sock_path = str(tmp_path / "ingest.sock")
+    t = threading.Thread(target=daemon.serve, args=(sock_path,), daemon=True)
+    t.start()
+    deadline = time.monotonic() + 5
+    while not (tmp_path / "ingest.sock").exists():
+        assert time.monotonic() < deadline, "daemon never bound its socket"
+        time.sleep(0.01)
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET) as s:
+        s.connect(sock_path)
+        for i in range(3):
+            s.send(json.dumps({"source": "sock", "message": f"m{i}"}).encode())
+        # malformed frames must be dropped, not poison the batch or
+        # unwind the serve loop: invalid JSON, and valid JSON that is
+        # not an object
+        s.send(b"not json")
+        s.send(b"42")
+        s.send(b'[1,2]')
+        s.send(json.dumps({"source": "sock", "message": "m-after-bad"}).encode())
+
+    while time.monotonic() < deadline:
+        conn = sqlite3.connect(db_path)
+        n = conn.execute("SELECT COUNT(*) FROM logs WHERE source='sock'").fetchone()[0]
+        conn.close()
+        if n == 4:
+            break
+        time.sleep(0.05)
+    assert n == 4
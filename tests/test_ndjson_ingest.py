@@ -0,0 +1,62 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    from api.utils import db
+
+    old_path, old_init = db.DB_PATH, db._initialized
+    db.DB_PATH = tmp_path_factory.mktemp("db") / "munin_memory.db"
+    db._initialized = False
+    db.ensure_initialized()
+    db.ensure_normalized_schema()
+
+    from api.main import app
+
+    yield TestClient(app)
+
+    db.close_all()
+    db.DB_PATH, db._initialized = old_path, old_init
+
+
+def _line(hash_, msg):
+    return json.dumps({"source_path": "a.log", "message": msg, "content_hash": hash_})
+
+
+def test_ndjson_counts_inserted_and_skipped(client):
+    body = "\n".join(
+        [
+            _line("h1", "first"),
+            _line("h2", "second"),
+            json.dumps({"message": "missing source_path and hash"}),
+            "not json at all",
+            _line("h1", "duplicate hash"),
+        ]
+    )
+    r = client.post("/ingest/batch/ndjson", content=body)
+    assert r.status_code == 200
+    data = r.json()
+    assert data["received"] == 5
+    assert data["skipped"] == 2
+    # h1 appears twice; OR IGNORE keeps only the first
+    assert data["inserted"] == 2
+
+
+def test_ndjson_duplicates_across_requests(client):
+    r = client.post("/ingest/batch/ndjson", content=_line("h1", "seen already"))
+    assert r.status_code == 200
+    data = r.json()
+    assert data["received"] == 1
+    assert data["inserted"] == 0
+    assert data["skipped"] == 0
+
+
+def test_ndjson_blank_lines_ignored(client):
+    r = client.post("/ingest/batch/ndjson", content="\n\n" + _line("h3", "third") + "\n")
+    assert r.status_code == 200
+    data = r.json()
+    assert data["received"] == 1
+    assert data["inserted"] == 1